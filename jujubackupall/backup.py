@@ -205,8 +205,9 @@ class JujuClientConfigBackup(ClientConfigBackup):
 
     def __init__(self, base_output_dir: Path):
         super().__init__(base_output_dir)
-        if os.environ.get("JUJU_DATA"):
-            self.client_config_location = Path(os.environ.get("JUJU_DATA"))
+        juju_data = os.environ.get("JUJU_DATA")
+        if juju_data:
+            self.client_config_location = Path(juju_data)
 
 
 @attr.s
@@ -256,6 +257,24 @@ class BackupTracker:
     def add_error(self, **kwargs):
         self.errors.append(kwargs)
 
+    def clear(self):
+        """Forget all tracked backups and errors."""
+        self.controller_backups.clear()
+        self.config_backups.clear()
+        self.app_backups.clear()
+        self.errors.clear()
+
+    def to_dict(self) -> dict:
+        """Generate dict representation of backups, as serialized by to_json."""
+        report = dict(
+            controller_backups=[attr.asdict(x) for x in self.controller_backups],
+            config_backups=[attr.asdict(x) for x in self.config_backups],
+            app_backups=[attr.asdict(x) for x in self.app_backups],
+        )
+        if self.errors:
+            report["errors"] = self.errors
+        return report
+
     def to_json(self):
         """Generate JSON representation of backups.
 
@@ -297,14 +316,7 @@ class BackupTracker:
           ]
         }
         """
-        report = dict(
-            controller_backups=[attr.asdict(x) for x in self.controller_backups],
-            config_backups=[attr.asdict(x) for x in self.config_backups],
-            app_backups=[attr.asdict(x) for x in self.app_backups],
-        )
-        if self.errors:
-            report["errors"] = self.errors
-        return json.dumps(report, indent=2)
+        return json.dumps(self.to_dict(), indent=2)
 
 
 def get_charm_backup_instance(
@@ -76,8 +76,9 @@ class Cli:
 
     @staticmethod
     def _configure_juju_data():
-        if os.environ.get("SNAP_REAL_HOME"):
-            os.environ["JUJU_DATA"] = "{}/.local/share/juju".format(os.environ.get("SNAP_REAL_HOME"))
+        snap_real_home = os.environ.get("SNAP_REAL_HOME")
+        if snap_real_home:
+            os.environ["JUJU_DATA"] = "{}/.local/share/juju".format(snap_real_home)
 
     def _configure_global_vars(self):
         globals.async_timeout = self.config.timeout
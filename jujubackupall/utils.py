@@ -19,11 +19,12 @@
 """Module that provides utility functions."""
 import os
 from asyncio import TimeoutError as AIOTimeoutError
-from asyncio import wait_for
+from asyncio import as_completed, ensure_future, gather, wait_for
 from concurrent.futures import TimeoutError as CFTimeoutError
 from contextlib import contextmanager
 from datetime import datetime, timezone
 from typing import Coroutine, List, Tuple
+from weakref import WeakKeyDictionary
 
 from juju.action import Action
 from juju.controller import Controller
@@ -37,6 +38,9 @@ from jujubackupall.async_handlers import run_async
 from jujubackupall.constants import MAX_FRAME_SIZE
 from jujubackupall.errors import ActionError, JujuTimeoutError, NoLeaderError
 
+# "controller" model handles, kept for as long as their controller is alive
+_controller_models: "WeakKeyDictionary[Controller, Model]" = WeakKeyDictionary()
+
 
 @contextmanager
 def connect_controller(controller_name: str) -> Controller:
@@ -72,14 +76,32 @@ def get_all_controllers() -> List[str]:
     return juju_controller_names
 
 
-def get_leader(units: List[Unit]) -> Unit:
-    for unit in units:
-        is_leader = run_async(unit.is_leader_from_status())
-        if is_leader:
-            return unit
+async def _get_leader(units: List[Unit]) -> Unit:
+    """Query leadership of all units concurrently and return the first leader found.
+
+    Once a leader is found, the remaining leadership queries are cancelled.
+    """
+
+    async def _leadership(unit: Unit) -> Tuple[Unit, bool]:
+        return unit, await unit.is_leader_from_status()
+
+    tasks = [ensure_future(_leadership(unit)) for unit in units]
+    try:
+        for next_done in as_completed(tasks):
+            unit, is_leader = await next_done
+            if is_leader:
+                return unit
+    finally:
+        for task in tasks:
+            task.cancel()
+        await gather(*tasks, return_exceptions=True)
     raise NoLeaderError(units=units)
 
 
+def get_leader(units: List[Unit]) -> Unit:
+    return run_async(_get_leader(units))
+
+
 def parse_charm_name(charm_url: str) -> str:
     parsed_charm_name = charm_url.split(":")[1].rsplit("-", 1)[0]
     if "/" in parsed_charm_name:
@@ -91,12 +113,16 @@ def get_datetime_string() -> str:
     return datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
 
 
+async def _check_output_unit_action_async(unit: Unit, action_name: str, **params) -> dict:
+    backup_action: Action = await unit.run_action(action_name, **params)
+    action: Action = await backup_action.wait()
+    if action.status != "completed":
+        raise ActionError(action)
+    return action.results
+
+
 def check_output_unit_action(unit: Unit, action_name: str, **params) -> dict:
-    backup_action: Action = run_async(unit.run_action(action_name, **params))
-    run_with_timeout(backup_action.wait(), action_name)
-    if backup_action.safe_data.get("status") != "completed":
-        raise ActionError(backup_action)
-    return backup_action.results
+    return run_with_timeout(_check_output_unit_action_async(unit, action_name, **params), action_name)
 
 
 def _fake_machine_public_address(machine):
@@ -181,7 +207,10 @@ def scp_from_machine(machine: Machine, source: str, destination: str):
 
 
 def backup_controller(controller: Controller) -> Tuple[Model, dict]:
-    controller_model: Model = run_async(controller.get_model("controller"))
+    controller_model = _controller_models.get(controller)
+    if controller_model is None:
+        controller_model = run_async(controller.get_model("controller"))
+        _controller_models[controller] = controller_model
     return run_with_timeout(
         controller_model.create_backup(), "controller backup on controller {}".format(controller.controller_name)
     )
@@ -14,121 +14,166 @@
 
 """Test juju-backup-all on multi-model controller"""
 
-import glob
+import asyncio
 import json
+import os
 import subprocess
 from pathlib import Path
+from typing import Dict, List
 
 import pytest
+import pytest_asyncio
+from juju.client.jujudata import FileJujuData
+from juju.model import Model
 
 WAIT_TIMEOUT = 20 * 60
-
-
-@pytest.mark.abort_on_fail
-@pytest.mark.skip_if_deployed
-async def test_build_and_deploy(ops_test):
-    """Deploy all applications."""
-
-    await ops_test.model.deploy(
+BASE_COMMAND = ["juju-backup-all"]
+# arguments limiting a juju-backup-all run to a single kind of backup
+MYSQL_ONLY = ("-e", "etcd", "-e", "postgresql", "-x", "-j")
+POSTGRESQL_ONLY = ("-e", "etcd", "-e", "mysql-innodb-cluster", "-x", "-j")
+ETCD_ONLY = ("-e", "mysql-innodb-cluster", "-e", "postgresql", "-x", "-j")
+CONTROLLER_ONLY = ("-e", "etcd", "-e", "mysql-innodb-cluster", "-e", "postgresql", "-j")
+CLIENT_CONFIG_ONLY = ("-e", "etcd", "-e", "mysql-innodb-cluster", "-e", "postgresql", "-x")
+
+
+@pytest.fixture(scope="session")
+def controller_name() -> str:
+    """Name of the current controller, which juju-backup-all backs up by default.
+
+    It is read from the local juju client data, so tests which only need the controller name
+    do not have to connect to a model.
+    """
+    return FileJujuData().current_controller()
+
+
+async def run_backup(args: List[str]) -> dict:
+    """Run juju-backup-all with the given arguments and return its JSON report."""
+    cmd = BASE_COMMAND + args
+    proc = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE)
+    output, _ = await proc.communicate()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, output=output)
+    return json.loads(output)
+
+
+def has_backup(directory: str, prefix: str, suffix: str = ".gz") -> bool:
+    """Check whether the directory contains a file with the given prefix and suffix."""
+    return any(entry.name.startswith(prefix) and entry.name.endswith(suffix) for entry in os.scandir(directory))
+
+
+def assert_app_backup_found(app_backups: List[dict], output_dir: Path, model_name: str):
+    """Assert that some app backup was downloaded into output_dir and some app backup is from model_name."""
+    found_path = found_model = False
+    for x in app_backups:
+        if str(output_dir) in x["download_path"]:
+            found_path = True
+        if x["model"] == model_name:
+            found_model = True
+        if found_path and found_model:
+            break
+    assert found_path and found_model
+
+
+@pytest_asyncio.fixture(scope="module")
+async def deployed_model(ops_test) -> Model:
+    """Deploy all applications once and return the model they are deployed in."""
+    model = ops_test.model
+    if model.applications:
+        # reusing a model which was already deployed, e.g. when running with --model
+        return model
+
+    await model.deploy(
         "ch:mysql-innodb-cluster", application_name="mysql", series="jammy", channel="8.0/stable", num_units=3
     )
-    await ops_test.model.deploy(
-        "ch:postgresql", application_name="postgresql", series="jammy", channel="14/stable", num_units=1
-    )
-    await ops_test.model.deploy("ch:etcd", application_name="etcd", series="jammy", channel="stable", num_units=1)
-    await ops_test.model.deploy("ch:easyrsa", application_name="easyrsa", series="jammy", channel="stable", num_units=1)
-    await ops_test.model.relate("etcd:certificates", "easyrsa:client")
+    await model.deploy("ch:postgresql", application_name="postgresql", series="jammy", channel="14/stable", num_units=1)
+    await model.deploy("ch:etcd", application_name="etcd", series="jammy", channel="stable", num_units=1)
+    await model.deploy("ch:easyrsa", application_name="easyrsa", series="jammy", channel="stable", num_units=1)
+    await model.relate("etcd:certificates", "easyrsa:client")
+
+    await model.wait_for_idle(timeout=WAIT_TIMEOUT, status="active", check_freq=3)
+    return model
 
-    await ops_test.model.wait_for_idle(timeout=WAIT_TIMEOUT, status="active", check_freq=3)
 
+@pytest.fixture(scope="module")
+def charm_urls(deployed_model: Model) -> Dict[str, str]:
+    """Charm URLs of the deployed applications, read once per module."""
+    return {name: deployed_model.applications[name].data["charm-url"] for name in ("mysql", "postgresql", "etcd")}
 
+
+# tests using the deployed applications are grouped, so they run on the same xdist worker
+@pytest.mark.xdist_group("backup")
 @pytest.mark.parametrize("backup_location", ["/var/backups/mysql", "/home/ubuntu/abc"])
-def test_mysql_innodb_backup(backup_location, ops_test, tmp_path: Path):
+async def test_mysql_innodb_backup(
+    backup_location, controller_name: str, deployed_model: Model, charm_urls: Dict[str, str], tmp_path: Path
+):
     mysql_innodb_app_name = "mysql"
-    model_name = ops_test.model.name
-    controller_name = ops_test.controller_name
-    mysql_innodb_app = ops_test.model.applications.get(mysql_innodb_app_name)
+    model_name = deployed_model.name
 
-    output = subprocess.check_output(
-        f"juju-backup-all -o {tmp_path} -e etcd -e postgresql -x -j --backup-location-on-mysql {backup_location}",
-        shell=True,
-    )
-    output_dict = json.loads(output)
-    expected_output_dir = tmp_path / controller_name / model_name / mysql_innodb_app_name
-    app_backup_entry = output_dict.get("app_backups")[0]
-    assert any(str(tmp_path) in x.get("download_path") for x in output_dict.get("app_backups"))
+    output_dict = await run_backup(["-o", str(tmp_path), *MYSQL_ONLY, "--backup-location-on-mysql", backup_location])
+    expected_output_dir = os.path.join(str(tmp_path), controller_name, model_name, mysql_innodb_app_name)
+    app_backups = output_dict["app_backups"]
+    app_backup_entry = app_backups[0]
+    assert_app_backup_found(app_backups, tmp_path, model_name)
     assert app_backup_entry.get("controller") == controller_name
-    assert any(x.get("model") == model_name for x in output_dict.get("app_backups"))
-    assert app_backup_entry.get("charm") in mysql_innodb_app.data.get("charm-url")
-    assert expected_output_dir.exists()
-    assert glob.glob(str(expected_output_dir) + "/mysqldump-all-databases*.gz")
+    assert app_backup_entry["charm"] in charm_urls[mysql_innodb_app_name]
+    assert os.path.isdir(expected_output_dir)
+    assert has_backup(expected_output_dir, "mysqldump-all-databases")
 
 
+@pytest.mark.xdist_group("backup")
 @pytest.mark.parametrize("backup_location", ["/home/ubuntu", "/home/ubuntu/abc"])
-def test_postgresql_backup(backup_location, ops_test, tmp_path: Path):
+async def test_postgresql_backup(
+    backup_location, controller_name: str, deployed_model: Model, charm_urls: Dict[str, str], tmp_path: Path
+):
     postgresql_app_name = "postgresql"
-    model_name = ops_test.model.name
-    controller_name = ops_test.controller_name
-    postgresql_app = ops_test.model.applications.get(postgresql_app_name)
+    model_name = deployed_model.name
 
-    output = subprocess.check_output(
-        f"juju-backup-all -o {tmp_path} -e etcd -e mysql-innodb-cluster -x -j --backup-location-on-postgresql {backup_location}",
-        shell=True,
+    output_dict = await run_backup(
+        ["-o", str(tmp_path), *POSTGRESQL_ONLY, "--backup-location-on-postgresql", backup_location]
     )
-    output_dict = json.loads(output)
-    expected_output_dir = tmp_path / controller_name / model_name / postgresql_app_name
-    app_backup_entry = output_dict.get("app_backups")[0]
-    assert any(str(tmp_path) in x.get("download_path") for x in output_dict.get("app_backups"))
+    expected_output_dir = os.path.join(str(tmp_path), controller_name, model_name, postgresql_app_name)
+    app_backups = output_dict["app_backups"]
+    app_backup_entry = app_backups[0]
+    assert_app_backup_found(app_backups, tmp_path, model_name)
     assert app_backup_entry.get("controller") == controller_name
-    assert any(x.get("model") == model_name for x in output_dict.get("app_backups"))
-    assert app_backup_entry.get("charm") in postgresql_app.data.get("charm-url")
-    assert expected_output_dir.exists()
-    assert glob.glob(str(expected_output_dir) + "/pgdump-all-databases*.gz")
+    assert app_backup_entry["charm"] in charm_urls[postgresql_app_name]
+    assert os.path.isdir(expected_output_dir)
+    assert has_backup(expected_output_dir, "pgdump-all-databases")
 
 
+@pytest.mark.xdist_group("backup")
 @pytest.mark.parametrize("backup_location", ["/home/ubuntu/etcd-snapshots", "/home/ubuntu/abc"])
-def test_etcd_backup(backup_location, ops_test, tmp_path: Path):
+async def test_etcd_backup(
+    backup_location, controller_name: str, deployed_model: Model, charm_urls: Dict[str, str], tmp_path: Path
+):
     etcd_app_name = "etcd"
-    model_name = ops_test.model.name
-    controller_name = ops_test.controller_name
-    etcd_app = ops_test.model.applications.get(etcd_app_name)
-    output = subprocess.check_output(
-        f"juju-backup-all -o {tmp_path} -e mysql-innodb-cluster -e postgresql -x -j --backup-location-on-etcd {backup_location}",
-        shell=True,
-    )
-    output_dict = json.loads(output)
-    expected_output_dir = tmp_path / controller_name / model_name / etcd_app_name
-    app_backup_entry = output_dict.get("app_backups")[0]
-    assert any(str(tmp_path) in x.get("download_path") for x in output_dict.get("app_backups"))
+    model_name = deployed_model.name
+    output_dict = await run_backup(["-o", str(tmp_path), *ETCD_ONLY, "--backup-location-on-etcd", backup_location])
+    expected_output_dir = os.path.join(str(tmp_path), controller_name, model_name, etcd_app_name)
+    app_backups = output_dict["app_backups"]
+    app_backup_entry = app_backups[0]
+    assert_app_backup_found(app_backups, tmp_path, model_name)
     assert app_backup_entry.get("controller") == controller_name
-    assert any(x.get("model") == model_name for x in output_dict.get("app_backups"))
-    assert app_backup_entry.get("charm") in etcd_app.data.get("charm-url")
-    assert expected_output_dir.exists()
-    assert glob.glob(str(expected_output_dir) + "/etcd-snapshot*.gz")
+    assert app_backup_entry["charm"] in charm_urls[etcd_app_name]
+    assert os.path.isdir(expected_output_dir)
+    assert has_backup(expected_output_dir, "etcd-snapshot")
 
 
-def test_juju_controller_backup(ops_test, tmp_path: Path):
-    controller_name = ops_test.controller_name
-    output = subprocess.check_output(
-        f"juju-backup-all -o {tmp_path} -e etcd -e mysql-innodb-cluster -e postgresql -j", shell=True
-    )
-    output_dict = json.loads(output)
-    expected_output_dir = tmp_path / controller_name
+async def test_juju_controller_backup(controller_name: str, tmp_path: Path):
+    output_dict = await run_backup(["-o", str(tmp_path), *CONTROLLER_ONLY])
+    expected_output_dir = os.path.join(str(tmp_path), controller_name)
     controller_backup_entry = output_dict.get("controller_backups")[0]
     assert str(tmp_path) in controller_backup_entry.get("download_path")
     assert controller_backup_entry.get("controller") == controller_name
-    assert expected_output_dir.exists()
-    assert glob.glob(str(expected_output_dir) + "/juju-controller-backup*.gz")
+    assert os.path.isdir(expected_output_dir)
+    assert has_backup(expected_output_dir, "juju-controller-backup")
 
 
-def test_juju_client_config_backup(tmp_path: Path):
-    output = subprocess.check_output(
-        f"juju-backup-all -o {tmp_path} -e etcd -e mysql-innodb-cluster -e postgresql -x", shell=True
-    )
-    output_dict = json.loads(output)
-    expected_output_dir = tmp_path / "local_configs"
+async def test_juju_client_config_backup(tmp_path: Path):
+    output_dict = await run_backup(["-o", str(tmp_path), *CLIENT_CONFIG_ONLY])
+    expected_output_dir = os.path.join(str(tmp_path), "local_configs")
     config_backup_entry = output_dict.get("config_backups")[0]
     assert str(tmp_path) in config_backup_entry.get("download_path")
     assert config_backup_entry.get("config") == "juju"
-    assert expected_output_dir.exists()
-    assert glob.glob(str(expected_output_dir) + "/juju-*.gz")
+    assert os.path.isdir(expected_output_dir)
+    assert has_backup(expected_output_dir, "juju-")
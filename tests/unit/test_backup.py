@@ -1,11 +1,16 @@
 #!/usr/bin/python3
 """ Unit tests for backup.py """
 import json
+import os
 import unittest
 from pathlib import Path
-from unittest.mock import Mock, call, patch
+from types import MappingProxyType
+from unittest.mock import DEFAULT, Mock, call, patch
 
+import pytest
+from juju.controller import Controller
 from juju.errors import JujuAPIError
+from juju.unit import Unit
 
 from jujubackupall.backup import (
     BackupTracker,
@@ -25,135 +30,122 @@ from jujubackupall.constants import (
 )
 from jujubackupall.errors import JujuControllerBackupError
 
+# stand-in unit for tests which only pass the unit through to the code under test
+_UNIT_SENTINEL = Mock(name="unit_sentinel", spec_set=Unit)
 
-class TestGetCharmBackupInstance(unittest.TestCase):
-    @patch("jujubackupall.backup.ssh_run_on_unit")
-    def test_get_backup_instance(self, mock_ssh_run_on_unit: Mock):
-        test_cases = [
-            ("mysql-innodb-cluster", MysqlInnodbBackup),
-            ("etcd", EtcdBackup),
-            ("postgresql", PostgresqlBackup),
-            ("swift-proxy", SwiftBackup),
-        ]
-        for charm_name, expected_backup_class in test_cases:
-            with self.subTest(charm_name=charm_name, expected_backup_class=expected_backup_class):
-                backup_instance = get_charm_backup_instance(
-                    charm_name,
-                    Mock(),
-                    Path(DEFAULT_BACKUP_LOCATION_ON_POSTGRESQL_UNIT),
-                    Path(DEFAULT_BACKUP_LOCATION_ON_MYSQL_UNIT),
-                    Path(DEFAULT_BACKUP_LOCATION_ON_ETCD_UNIT),
-                )
-                self.assertIsInstance(backup_instance, expected_backup_class)
-
-
-class TestJujuControllerBackup(unittest.TestCase):
-    def setUp(self):
-        self.mock_controller = Mock()
-        self.mock_save_path = Path("mypath")
-        self.controller_backup = JujuControllerBackup(controller=self.mock_controller, save_path=self.mock_save_path)
-
-    def get_juju_api_error(self):
-        error_result = {
-            "error": "my error",
-            "error-code": 1,
-            "response": "some response",
-            "request-id": "123-abc",
-        }
-        return JujuAPIError(error_result)
-
-    @patch("shutil.move")
-    @patch("jujubackupall.backup.backup_controller")
-    @patch("jujubackupall.backup.get_datetime_string")
-    @patch("jujubackupall.backup.ensure_path_exists")
-    def test_backup_controller_first_success(
-        self,
-        mock_path_exists: Mock,
-        mock_get_datetime_string: Mock,
-        mock_backup_controller: Mock,
-        mock_shutil_move: Mock,
-    ):
-        results_dict = {"filename": "myfile", "controller-machine-id": "0"}
-        local_backup_filename = "local_filename"
-        mock_backup_controller.return_value = (local_backup_filename, results_dict)
+CHARM_CASES = (
+    ("mysql-innodb-cluster", MysqlInnodbBackup),
+    ("etcd", EtcdBackup),
+    ("postgresql", PostgresqlBackup),
+    ("swift-proxy", SwiftBackup),
+)
 
-        return_path = self.controller_backup.backup()
 
-        mock_backup_controller.assert_called_once_with(self.controller_backup.controller)
-        mock_shutil_move.assert_called_once_with(local_backup_filename, return_path)
-        mock_path_exists.assert_called_once_with(self.controller_backup.save_path)
-        mock_get_datetime_string.assert_called_once()
-        self.assertEqual(return_path.parent, self.mock_save_path.absolute())
+@pytest.mark.parametrize("charm_name, expected_backup_class", CHARM_CASES)
+def test_get_backup_instance(charm_name, expected_backup_class):
+    backup_instance = get_charm_backup_instance(
+        charm_name,
+        _UNIT_SENTINEL,
+        Path(DEFAULT_BACKUP_LOCATION_ON_POSTGRESQL_UNIT),
+        Path(DEFAULT_BACKUP_LOCATION_ON_MYSQL_UNIT),
+        Path(DEFAULT_BACKUP_LOCATION_ON_ETCD_UNIT),
+    )
+    assert isinstance(backup_instance, expected_backup_class)
+
+
+JUJU_API_ERROR = JujuAPIError(
+    {
+        "error": "my error",
+        "error-code": 1,
+        "response": "some response",
+        "request-id": "123-abc",
+    }
+)
 
-    @patch("shutil.move")
-    @patch("jujubackupall.backup.backup_controller")
-    @patch("jujubackupall.backup.get_datetime_string")
-    @patch("jujubackupall.backup.ensure_path_exists")
-    def test_backup_controller_one_fail_then_success(
-        self,
-        mock_path_exists: Mock,
-        mock_get_datetime_string: Mock,
-        mock_backup_controller: Mock,
-        mock_shutil_move: Mock,
-    ):
-        results_dict = {"filename": "myfile", "controller-machine-id": "0"}
-        mock_backup_controller.side_effect = [self.get_juju_api_error(), ("local_filename", results_dict)]
 
-        result = self.controller_backup.backup()
+@pytest.fixture
+def controller_backup_mocks():
+    with patch.multiple(
+        "jujubackupall.backup",
+        shutil=DEFAULT,
+        backup_controller=DEFAULT,
+        get_datetime_string=DEFAULT,
+        ensure_path_exists=DEFAULT,
+    ) as mocks:
+        yield mocks
 
-        self.assertIsInstance(result, Path)
-        self.assertEqual(mock_backup_controller.call_count, 2, "assert backup_controller was called twice")
 
-    @patch("jujubackupall.backup.backup_controller")
-    @patch("jujubackupall.backup.get_datetime_string")
-    @patch("jujubackupall.backup.ensure_path_exists")
-    def test_backup_controller_all_fail_raise_exception(
-        self, mock_path_exists: Mock, mock_get_datetime_string: Mock, mock_backup_controller: Mock
-    ):
-        mock_backup_controller.side_effect = self.get_juju_api_error()
-        self.assertRaises(JujuControllerBackupError, self.controller_backup.backup)
-        self.assertEqual(
-            mock_backup_controller.call_count,
-            MAX_CONTROLLER_BACKUP_RETRIES,
-            "assert check_output was called {} times.".format(MAX_CONTROLLER_BACKUP_RETRIES),
-        )
+@pytest.fixture
+def controller_backup():
+    return JujuControllerBackup(controller=Mock(spec_set=Controller), save_path=Path("mypath"))
+
+
+def test_backup_controller_first_success(controller_backup, controller_backup_mocks):
+    results_dict = {"filename": "myfile", "controller-machine-id": "0"}
+    local_backup_filename = "local_filename"
+    controller_backup_mocks["backup_controller"].return_value = (local_backup_filename, results_dict)
+
+    return_path = controller_backup.backup()
+
+    controller_backup_mocks["backup_controller"].assert_called_once_with(controller_backup.controller)
+    controller_backup_mocks["shutil"].move.assert_called_once_with(local_backup_filename, return_path)
+    controller_backup_mocks["ensure_path_exists"].assert_called_once_with(controller_backup.save_path)
+    controller_backup_mocks["get_datetime_string"].assert_called_once()
+    assert return_path.parent == controller_backup.save_path.absolute()
+
+
+@pytest.mark.parametrize(
+    "side_effect, expected_calls, raises",
+    [
+        ([JUJU_API_ERROR, ("local_filename", {"filename": "myfile", "controller-machine-id": "0"})], 2, None),
+        ([JUJU_API_ERROR] * MAX_CONTROLLER_BACKUP_RETRIES, MAX_CONTROLLER_BACKUP_RETRIES, JujuControllerBackupError),
+    ],
+)
+def test_backup_controller_retries(controller_backup, controller_backup_mocks, side_effect, expected_calls, raises):
+    controller_backup_mocks["backup_controller"].side_effect = side_effect
+    if raises is None:
+        assert isinstance(controller_backup.backup(), Path)
+    else:
+        with pytest.raises(raises):
+            controller_backup.backup()
+    assert controller_backup_mocks["backup_controller"].call_count == expected_calls
 
 
 class TestJujuClientConfigBackup(unittest.TestCase):
-    @patch("jujubackupall.backup.os")
-    def test_juju_client_config_backup_create_no_environ(self, mock_os: Mock):
+    def setUp(self):
+        patcher = patch.multiple("jujubackupall.backup", ensure_path_exists=DEFAULT, shutil=DEFAULT)
+        self.mocks = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_juju_client_config_backup_create_no_environ(self):
         output_path = Path("mypath")
-        mock_os.environ.get.return_value = None
         class_client_config_location = JujuClientConfigBackup.client_config_location
         juju_config_backup_inst = JujuClientConfigBackup(output_path)
         self.assertEqual(juju_config_backup_inst.client_config_location, class_client_config_location)
 
-    @patch("jujubackupall.backup.os")
-    def test_juju_client_config_backup_create_with_environ(self, mock_os: Mock):
+    @patch.dict(os.environ, {"JUJU_DATA": "alt-path"})
+    def test_juju_client_config_backup_create_with_environ(self):
         env_path = "alt-path"
         output_path = Path("mypath")
-        mock_os.environ.get.return_value = env_path
         juju_config_backup_inst = JujuClientConfigBackup(output_path)
         self.assertEqual(juju_config_backup_inst.client_config_location, Path(env_path))
 
-    @patch("jujubackupall.backup.shutil")
-    @patch("jujubackupall.backup.ensure_path_exists")
-    @patch("jujubackupall.backup.os")
-    def test_juju_client_config_backup(self, mock_os: Mock, mock_ensure_path: Mock, mock_shutil: Mock):
+    @patch.dict(os.environ, {}, clear=True)
+    def test_juju_client_config_backup(self):
         output_path = Path("my/path")
-        mock_os.environ.get.return_value = None
-        mock_shutil.make_archive.return_value = output_path / "archive.tar.gz"
+        self.mocks["shutil"].make_archive.return_value = output_path / "archive.tar.gz"
         juju_config_backup_inst = JujuClientConfigBackup(output_path)
         juju_config_backup_inst.backup()
-        mock_ensure_path.assert_called_once()
-        mock_shutil.make_archive.assert_called_once()
+        self.mocks["ensure_path_exists"].assert_called_once()
+        self.mocks["shutil"].make_archive.assert_called_once()
 
 
 class TestMysqlBackup(unittest.TestCase):
     @patch("jujubackupall.backup.check_output_unit_action")
     @patch("jujubackupall.backup.ssh_run_on_unit")
     def test_backup_innodb(self, mock_ssh_run_on_unit: Mock, mock_check_output_unit_action: Mock):
-        mock_unit = Mock()
+        mock_unit = _UNIT_SENTINEL
         backup_basedir = Path("/home/ubuntu")
         mysql_dumpfile = "mydumpfile"
         results_dict = {"mysqldump-file": mysql_dumpfile}
@@ -176,7 +168,7 @@ class TestMysqlBackup(unittest.TestCase):
     ):
         save_path = Path("my-path")
         backup_filepath = Path("some-path")
-        mock_unit = Mock()
+        mock_unit = _UNIT_SENTINEL
         mysql_innodb_backup = MysqlInnodbBackup(mock_unit, backup_basedir=None)
         mysql_innodb_backup.backup_filepath = backup_filepath
         mysql_innodb_backup.download_backup(save_path)
@@ -191,7 +183,7 @@ class TestEtcdBackup(unittest.TestCase):
     @patch("jujubackupall.backup.check_output_unit_action")
     @patch("jujubackupall.backup.ssh_run_on_unit")
     def test_etcd_backup(self, mock_ssh_run_on_unit: Mock, mock_check_output_unit_action: Mock):
-        mock_unit = Mock()
+        mock_unit = _UNIT_SENTINEL
         backup_basedir = Path("/home/ubuntu")
         expected_path_string = "my_path"
         results_dict = {"snapshot": {"path": expected_path_string}}
@@ -207,7 +199,7 @@ class TestEtcdBackup(unittest.TestCase):
 class TestPostgresqlBackup(unittest.TestCase):
     @patch("jujubackupall.backup.ssh_run_on_unit")
     def test_postgresql_backup(self, mock_ssh_run_on_unit: Mock):
-        mock_unit = Mock()
+        mock_unit = _UNIT_SENTINEL
         backup_basedir = Path("/home/ubuntu")
         postgresql_backup_inst = PostgresqlBackup(mock_unit, backup_basedir=backup_basedir)
         expected_path_string = backup_basedir / postgresql_backup_inst.pgdump_filename
@@ -218,34 +210,46 @@ class TestPostgresqlBackup(unittest.TestCase):
         )
 
 
-class TestBackupTracker(unittest.TestCase):
-    app_backups = [
-        dict(controller="controller1", model="model1", charm="charm1", app="app1", download_path="mypath1"),
-        dict(controller="controller2", model="model2", charm="charm2", app="app2", download_path="mypath2"),
-    ]
+APP_BACKUPS = (
+    MappingProxyType(
+        dict(controller="controller1", model="model1", charm="charm1", app="app1", download_path="mypath1")
+    ),
+    MappingProxyType(
+        dict(controller="controller2", model="model2", charm="charm2", app="app2", download_path="mypath2")
+    ),
+)
+
+CONFIG_BACKUPS = (
+    MappingProxyType(dict(config="config1", download_path="mypath3")),
+    MappingProxyType(dict(config="config2", download_path="mypath4")),
+)
+
+CONTROLLER_BACKUPS = (
+    MappingProxyType(dict(controller="controller1", download_path="mypath5")),
+    MappingProxyType(dict(controller="controller2", download_path="mypath6")),
+)
 
-    config_backups = [
-        dict(config="config1", download_path="mypath3"),
-        dict(config="config2", download_path="mypath4"),
-    ]
 
-    controller_backups = [
-        dict(controller="controller1", download_path="mypath5"),
-        dict(controller="controller2", download_path="mypath6"),
-    ]
+def generate_expected_output(apps, configs, controllers):
+    return dict(
+        controller_backups=[dict(x) for x in controllers],
+        config_backups=[dict(x) for x in configs],
+        app_backups=[dict(x) for x in apps],
+    )
+
+
+class TestBackupTracker(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tracker = BackupTracker()
 
     def setUp(self) -> None:
-        self.tracker = BackupTracker()
+        self.tracker.clear()
 
     def assert_output(self, expected_output):
-        actual_output = self.tracker.to_json()
+        actual_output = self.tracker.to_dict()
         self.assertEqual(expected_output, actual_output)
 
-    @staticmethod
-    def generate_expected_output(apps, configs, controllers):
-        d = dict(controller_backups=controllers, config_backups=configs, app_backups=apps)
-        return json.dumps(d, indent=2)
-
     def add_app_backups_to_tracker(self, app_backup_dicts):
         for app_backup_dict in app_backup_dicts:
             self.tracker.add_app_backup(
@@ -271,32 +275,23 @@ class TestBackupTracker(unittest.TestCase):
             )
 
     def test_report_multi_apps(self):
-        expected_output = self.generate_expected_output(apps=self.app_backups, controllers=[], configs=[])
-        self.add_app_backups_to_tracker(self.app_backups)
+        expected_output = generate_expected_output(apps=APP_BACKUPS, controllers=[], configs=[])
+        self.add_app_backups_to_tracker(APP_BACKUPS)
         self.assert_output(expected_output)
 
     def test_report_one_app(self):
-        expected_output = self.generate_expected_output(apps=self.app_backups[0:1], controllers=[], configs=[])
-        self.add_app_backups_to_tracker(self.app_backups[0:1])
+        expected_output = generate_expected_output(apps=APP_BACKUPS[0:1], controllers=[], configs=[])
+        self.add_app_backups_to_tracker(APP_BACKUPS[0:1])
         self.assert_output(expected_output)
 
     def test_report_multi_controllers(self):
-        expected_output = self.generate_expected_output(apps=[], controllers=self.controller_backups, configs=[])
-        self.add_controller_backups_to_tracker(self.controller_backups)
+        expected_output = generate_expected_output(apps=[], controllers=CONTROLLER_BACKUPS, configs=[])
+        self.add_controller_backups_to_tracker(CONTROLLER_BACKUPS)
         self.assert_output(expected_output)
 
     def test_multi_configs(self):
-        expected_output = self.generate_expected_output(apps=[], controllers=[], configs=self.config_backups)
-        self.add_config_backups_to_tracker(self.config_backups)
-        self.assert_output(expected_output)
-
-    def test_all_no_errors(self):
-        expected_output = self.generate_expected_output(
-            apps=self.app_backups, controllers=self.controller_backups, configs=self.config_backups
-        )
-        self.add_app_backups_to_tracker(self.app_backups)
-        self.add_config_backups_to_tracker(self.config_backups)
-        self.add_controller_backups_to_tracker(self.controller_backups)
+        expected_output = generate_expected_output(apps=[], controllers=[], configs=CONFIG_BACKUPS)
+        self.add_config_backups_to_tracker(CONFIG_BACKUPS)
         self.assert_output(expected_output)
 
     def test_all_errors(self):
@@ -305,9 +300,37 @@ class TestBackupTracker(unittest.TestCase):
             dict(config="config2", error_reason="some other reason"),
             dict(controller="app", app="some-app", error_reason="some other reason"),
         ]
-        expected_output = json.dumps(
-            dict(controller_backups=[], config_backups=[], app_backups=[], errors=error_list), indent=2
-        )
+        expected_output = dict(controller_backups=[], config_backups=[], app_backups=[], errors=error_list)
         for error in error_list:
             self.tracker.add_error(**error)
         self.assert_output(expected_output)
+
+    def test_to_json(self):
+        self.add_app_backups_to_tracker(APP_BACKUPS)
+        self.tracker.add_error(controller="controller1", error_reason="some reason")
+        self.assertEqual(self.tracker.to_json(), json.dumps(self.tracker.to_dict(), indent=2))
+
+    def test_clear(self):
+        self.add_app_backups_to_tracker(APP_BACKUPS)
+        self.add_config_backups_to_tracker(CONFIG_BACKUPS)
+        self.add_controller_backups_to_tracker(CONTROLLER_BACKUPS)
+        self.tracker.add_error(controller="controller1", error_reason="some reason")
+        self.tracker.clear()
+        self.assert_output(generate_expected_output(apps=[], controllers=[], configs=[]))
+
+
+@pytest.fixture(scope="module")
+def fully_loaded_tracker():
+    tracker = BackupTracker()
+    for app_backup in APP_BACKUPS:
+        tracker.add_app_backup(**app_backup)
+    for config_backup in CONFIG_BACKUPS:
+        tracker.add_config_backup(**config_backup)
+    for controller_backup in CONTROLLER_BACKUPS:
+        tracker.add_controller_backup(**controller_backup)
+    return tracker
+
+
+def test_all_no_errors(fully_loaded_tracker):
+    expected_output = generate_expected_output(apps=APP_BACKUPS, controllers=CONTROLLER_BACKUPS, configs=CONFIG_BACKUPS)
+    assert fully_loaded_tracker.to_dict() == expected_output
@@ -2,9 +2,11 @@
 """ Unit tests for cli.py """
 import argparse
 import unittest
-from io import StringIO
+from types import MappingProxyType
 from unittest.mock import Mock, patch
 
+import pytest
+
 from jujubackupall.cli import Cli, make_cli_parser
 from jujubackupall.constants import (
     DEFAULT_BACKUP_LOCATION_ON_ETCD_UNIT,
@@ -25,25 +27,28 @@ backup_location_on_postgresql = DEFAULT_BACKUP_LOCATION_ON_POSTGRESQL_UNIT
 backup_location_on_mysql = DEFAULT_BACKUP_LOCATION_ON_MYSQL_UNIT
 backup_location_on_etcd = DEFAULT_BACKUP_LOCATION_ON_ETCD_UNIT
 
+_ARGS = MappingProxyType(
+    dict(
+        all_controllers=all_controllers,
+        backup_controller=backup_controller,
+        backup_juju_client_config=backup_juju_client_config,
+        controllers=controllers,
+        excluded_charms=excluded_charms,
+        output_dir=output_dir,
+        log_level=log_level,
+        timeout=timeout,
+        backup_location_on_postgresql=backup_location_on_postgresql,
+        backup_location_on_mysql=backup_location_on_mysql,
+        backup_location_on_etcd=backup_location_on_etcd,
+    )
+)
+
 
 class TestCli(unittest.TestCase):
     @staticmethod
-    def args() -> dict:
-        """Premade args dict for quick args config."""
-        args_dict = dict(
-            all_controllers=all_controllers,
-            backup_controller=backup_controller,
-            backup_juju_client_config=backup_juju_client_config,
-            controllers=controllers,
-            excluded_charms=excluded_charms,
-            output_dir=output_dir,
-            log_level=log_level,
-            timeout=timeout,
-            backup_location_on_postgresql=backup_location_on_postgresql,
-            backup_location_on_mysql=backup_location_on_mysql,
-            backup_location_on_etcd=backup_location_on_etcd,
-        )
-        return args_dict
+    def args() -> MappingProxyType:
+        """Premade read-only args mapping for quick args config."""
+        return _ARGS
 
     @patch("jujubackupall.cli.Config")
     @patch("jujubackupall.cli.make_cli_parser")
@@ -56,6 +61,7 @@ class TestCli(unittest.TestCase):
         mock_config.assert_called_once_with(self.args())
         self.assertIsInstance(cli, Cli)
 
+    @patch("jujubackupall.cli.globals")
     @patch("jujubackupall.cli.os")
     @patch("jujubackupall.cli.logging")
     @patch("jujubackupall.cli.Config")
@@ -68,6 +74,7 @@ class TestCli(unittest.TestCase):
         mock_config_class: Mock,
         mock_logging: Mock,
         mock_os: Mock,
+        mock_globals: Mock,
     ):
         mock_config_inst = Mock()
         mock_backup_processor_inst = Mock()
@@ -94,30 +101,27 @@ class TestCli(unittest.TestCase):
         self.assertNotIn("JUJU_DATA", mock_os.environ)
 
 
-class TestMakeParser(unittest.TestCase):
-    def test_exclude_charms_individual(self):
-        parser = make_cli_parser()
-        for charm in SUPPORTED_BACKUP_CHARMS:
-            with self.subTest(charm=charm):
-                res = parser.parse_args(["--exclude-charm", charm])
-                self.assertListEqual(res.excluded_charms, [charm])
-
-    def test_exclude_all_charms(self):
-        parser = make_cli_parser()
-        full_args = []
-        for i in range(len(SUPPORTED_BACKUP_CHARMS)):
-            full_args.append("--exclude-charm")
-            full_args.append(SUPPORTED_BACKUP_CHARMS[i])
-        res = parser.parse_args(full_args)
-        self.assertListEqual(res.excluded_charms, SUPPORTED_BACKUP_CHARMS)
-
-    @patch("sys.stderr", new_callable=StringIO)
-    def test_exclude_charm_not_supported_fails(self, mock_stderr):
-        parser = make_cli_parser()
-        with self.assertRaises(SystemExit):
-            parser.parse_args(["--exclude-charm", "a-charm"])
-        self.assertRegexpMatches(mock_stderr.getvalue(), r"a-charm")
-
-
-if __name__ == "__main__":
-    unittest.main()
+@pytest.fixture(scope="module")
+def parser() -> argparse.ArgumentParser:
+    """CLI parser shared by the tests in this module; parse_args does not mutate it."""
+    return make_cli_parser()
+
+
+@pytest.mark.parametrize("charm", SUPPORTED_BACKUP_CHARMS)
+def test_exclude_charms_individual(parser, charm):
+    res = parser.parse_args(["--exclude-charm", charm])
+    assert res.excluded_charms == [charm]
+
+
+def test_exclude_all_charms(parser):
+    full_args = []
+    for charm in SUPPORTED_BACKUP_CHARMS:
+        full_args.extend(["--exclude-charm", charm])
+    res = parser.parse_args(full_args)
+    assert res.excluded_charms == SUPPORTED_BACKUP_CHARMS
+
+
+def test_exclude_charm_not_supported_fails(parser, capsys):
+    with pytest.raises(SystemExit):
+        parser.parse_args(["--exclude-charm", "a-charm"])
+    assert "a-charm" in capsys.readouterr().err
@@ -1,10 +1,12 @@
 #!/usr/bin/python3
 """ Unit tests for cli.py """
 import unittest
-from collections import namedtuple
 from pathlib import Path
-from unittest.mock import ANY, Mock, call, patch
+from unittest.mock import ANY, MagicMock, Mock, call, patch
 
+import pytest
+
+from jujubackupall.config import Config
 from jujubackupall.constants import (
     DEFAULT_BACKUP_LOCATION_ON_ETCD_UNIT,
     DEFAULT_BACKUP_LOCATION_ON_MYSQL_UNIT,
@@ -14,29 +16,48 @@ from jujubackupall.constants import (
 from jujubackupall.errors import ActionError, JujuControllerBackupError, NoLeaderError
 from jujubackupall.process import BackupProcessor, ControllerProcessor, JujuModel
 
-SubtestCase = namedtuple("SubtestCase", ["name", "input", "expected"])
+_ALL_CHARMS_BUT_MYSQL_INNODB = tuple(charm for charm in SUPPORTED_BACKUP_CHARMS if charm != "mysql-innodb-cluster")
+
+
+@pytest.mark.parametrize(
+    "excluded_charms, expected",
+    [
+        pytest.param([], SUPPORTED_BACKUP_CHARMS, id="none-excluded"),
+        pytest.param(SUPPORTED_BACKUP_CHARMS, [], id="all-excluded"),
+        pytest.param(
+            ["mysql-innodb-cluster"],
+            _ALL_CHARMS_BUT_MYSQL_INNODB,
+            id="mysql-innodb-excluded",
+        ),
+    ],
+)
+def test_apps_to_backup(excluded_charms, expected):
+    mock_config = MagicMock(spec=Config)
+    mock_config.excluded_charms = excluded_charms
+    backup_processor = BackupProcessor(mock_config)
+    assert sorted(backup_processor.apps_to_backup) == sorted(expected)
 
 
 class TestBackupProcessor(unittest.TestCase):
-    @patch("jujubackupall.process.Config", return_value=Mock())
-    def setUp(self, mock_config) -> None:
-        self.mock_config = mock_config
+    def setUp(self) -> None:
+        self.mock_config = MagicMock(spec=Config)
         self.mock_config.backup_juju_client_config = False
-
-    def test_apps_to_backup(self):
-        all_charms_but_mysql_innodb = list(set(SUPPORTED_BACKUP_CHARMS) - {"mysql-innodb-cluster"})
-        test_cases = [
-            SubtestCase(name="none excluded", input=[], expected=SUPPORTED_BACKUP_CHARMS),
-            SubtestCase(name="all excluded", input=SUPPORTED_BACKUP_CHARMS, expected=[]),
-            SubtestCase(
-                name="mysql-innodb excluded", input=["mysql-innodb-cluster"], expected=all_charms_but_mysql_innodb
-            ),
-        ]
-        for test_case in test_cases:
-            with self.subTest(test_case=test_cases):
-                self.mock_config.excluded_charms = test_case.input
-                backup_processor = BackupProcessor(self.mock_config)
-                self.assertEqual(backup_processor.apps_to_backup, test_case.expected)
+        tracker_patcher = patch("jujubackupall.process.tracker")
+        self.mock_tracker = tracker_patcher.start()
+        self.addCleanup(tracker_patcher.stop)
+
+    def configure_config(self, **overrides):
+        """Set the config attributes used by process_backups, with defaults for an explicit controller list."""
+        config_attrs = dict(
+            all_controllers=False,
+            use_current_controller=False,
+            backup_controller=False,
+            backup_juju_client_config=False,
+            controllers=[],
+            output_dir="juju-backups",
+        )
+        config_attrs.update(overrides)
+        self.mock_config.configure_mock(**config_attrs)
 
     def test_controller_names_already_set_current_controller(self):
         self.mock_config.use_current_controller = True
@@ -62,9 +83,7 @@ class TestBackupProcessor(unittest.TestCase):
 
     def test_controller_names_controller_list(self):
         controller_list = ["controller1", "controller2"]
-        self.mock_config.all_controllers = False
-        self.mock_config.use_current_controller = False
-        self.mock_config.controllers = controller_list
+        self.configure_config(controllers=controller_list)
         backup_processor = BackupProcessor(self.mock_config)
         actual_controllers = backup_processor.controller_names
         self.assertListEqual(actual_controllers, controller_list)
@@ -75,11 +94,7 @@ class TestBackupProcessor(unittest.TestCase):
         self, mock_controller_processor_class: Mock, mock_connect_controller: Mock
     ):
         controller_list = ["controller1", "controller2"]
-        self.mock_config.all_controllers = False
-        self.mock_config.use_current_controller = False
-        self.mock_config.backup_controller = True
-        self.mock_config.controllers = controller_list
-        self.mock_config.output_dir = "juju-backups"
+        self.configure_config(backup_controller=True, controllers=controller_list)
 
         mock_controller_processor = Mock()
         mock_controller_processor_class.return_value = mock_controller_processor
@@ -94,11 +109,6 @@ class TestBackupProcessor(unittest.TestCase):
             len(controller_list),
             "assert backup_models called correct number of times",
         )
-        self.assertEqual(
-            mock_controller_processor.backup_models.call_count,
-            len(controller_list),
-            "assert backup_models called correct number of times",
-        )
         mock_controller_processor.backup_controller.assert_called()
 
     @patch("jujubackupall.process.connect_controller")
@@ -107,11 +117,7 @@ class TestBackupProcessor(unittest.TestCase):
         self, mock_controller_processor_class: Mock, mock_connect_controller: Mock
     ):
         controller_list = ["controller1", "controller2"]
-        self.mock_config.all_controllers = False
-        self.mock_config.use_current_controller = False
-        self.mock_config.backup_controller = False
-        self.mock_config.controllers = controller_list
-        self.mock_config.output_dir = "juju-backups"
+        self.configure_config(controllers=controller_list)
 
         mock_controller_processor = Mock()
         mock_controller_processor_class.return_value = mock_controller_processor
@@ -128,15 +134,9 @@ class TestBackupProcessor(unittest.TestCase):
         )
         mock_controller_processor.backup_controller.assert_not_called()
 
-    @patch("jujubackupall.process.tracker")
     @patch("jujubackupall.process.JujuClientConfigBackup")
-    def test_process_backups_backup_juju_config(self, mock_juju_config_backup: Mock, mock_tracker: Mock):
-        self.mock_config.all_controllers = False
-        self.mock_config.use_current_controller = False
-        self.mock_config.backup_controller = False
-        self.mock_config.backup_juju_client_config = True
-        self.mock_config.controllers = []
-        self.mock_config.output_dir = "juju-backups"
+    def test_process_backups_backup_juju_config(self, mock_juju_config_backup: Mock):
+        self.configure_config(backup_juju_client_config=True)
 
         mock_juju_config_backup_inst = Mock()
         mock_juju_config_backup.return_value = mock_juju_config_backup_inst
@@ -146,15 +146,26 @@ class TestBackupProcessor(unittest.TestCase):
         backup_processor.process_backups()
         mock_juju_config_backup.assert_called_with(Path(self.mock_config.output_dir))
         mock_juju_config_backup_inst.backup.assert_called_once()
-        mock_tracker.to_json.assert_called_once()
+        self.mock_tracker.to_json.assert_called_once()
 
 
 class TestControllerProcessor(unittest.TestCase):
-    @patch("jujubackupall.process.Controller", controller_name="test-controller")
-    def setUp(self, mock_controller) -> None:
-        self.mock_controller = mock_controller
-        self.base_output_path = Path("juju-backups")
-        self.apps_to_backup = SUPPORTED_BACKUP_CHARMS
+    base_output_path = Path("juju-backups")
+    apps_to_backup = SUPPORTED_BACKUP_CHARMS
+
+    @classmethod
+    def setUpClass(cls):
+        cls.mock_controller = Mock()
+
+    def setUp(self) -> None:
+        self.mock_controller.reset_mock()
+        self.mock_controller.controller_name = "test-controller"
+        tracker_patcher = patch("jujubackupall.process.tracker")
+        self.mock_tracker = tracker_patcher.start()
+        self.addCleanup(tracker_patcher.stop)
+        log_patcher = patch.object(ControllerProcessor, "_log")
+        log_patcher.start()
+        self.addCleanup(log_patcher.stop)
 
     def create_controller_processor(self):
         return ControllerProcessor(
@@ -188,9 +199,8 @@ class TestControllerProcessor(unittest.TestCase):
         )
         mock_juju_controller_backup_inst.backup.assert_called_once()
 
-    @patch("jujubackupall.process.tracker")
     @patch("jujubackupall.process.JujuControllerBackup", return_value=Mock())
-    def test_backup_controller_fails(self, mock_juju_controller_backup_class: Mock, mock_tracker: Mock):
+    def test_backup_controller_fails(self, mock_juju_controller_backup_class: Mock):
         controller_name = "my-controller"
         self.mock_controller.controller_name = controller_name
         mock_juju_controller_backup_inst = Mock()
@@ -202,15 +212,14 @@ class TestControllerProcessor(unittest.TestCase):
         controller_processor = self.create_controller_processor()
         controller_processor.backup_controller()
 
-        mock_tracker.add_error.assert_called_once_with(controller=controller_name, error_reason=str(juju_backup_error))
+        self.mock_tracker.add_error.assert_called_once_with(
+            controller=controller_name, error_reason=str(juju_backup_error)
+        )
 
-    @patch("jujubackupall.process.ControllerProcessor._log")
     @patch("jujubackupall.process.ControllerProcessor.backup_apps")
     @patch("jujubackupall.process.connect_model")
     @patch("jujubackupall.process.run_async")
-    def test_backup_models(
-        self, mock_run_async: Mock, mock_connect_model: Mock, mock_backup_apps: Mock, mock_log: Mock
-    ):
+    def test_backup_models(self, mock_run_async: Mock, mock_connect_model: Mock, mock_backup_apps: Mock):
         model_names = ["model1", "model2"]
         mock_run_async.return_value = model_names
 
@@ -218,14 +227,12 @@ class TestControllerProcessor(unittest.TestCase):
         controller_processor.backup_models()
 
         connect_model_calls = [call(self.mock_controller, name) for name in model_names]
-        print(mock_connect_model)
         mock_connect_model.assert_has_calls(connect_model_calls, any_order=True)
         self.assertEqual(
             mock_backup_apps.call_count, len(model_names), "assert backup_apps called expected number of times"
         )
 
     @patch("jujubackupall.process.ControllerProcessor.generate_full_backup_path")
-    @patch("jujubackupall.process.ControllerProcessor._log")
     @patch("jujubackupall.process.get_leader")
     @patch("jujubackupall.process.get_charm_backup_instance")
     def test_backup_apps_all_supported(
@@ -233,7 +240,6 @@ class TestControllerProcessor(unittest.TestCase):
         mock_get_backup_instance: Mock,
         mock_get_leader: Mock,
         mock_generate_full_backup_path: Mock,
-        mock_log: Mock,
     ):
         model_name = "my-model"
         mock_model = Mock()
@@ -262,11 +268,7 @@ class TestControllerProcessor(unittest.TestCase):
 
     @patch("jujubackupall.process.get_leader")
     @patch("jujubackupall.process.get_charm_backup_instance")
-    @patch("jujubackupall.process.ControllerProcessor._log")
-    @patch("jujubackupall.process.tracker")
-    def test_backup_app_action_error(
-        self, mock_tracker: Mock, mock_log: Mock, mock_get_charm_backup_instance: Mock, mock_get_leader: Mock
-    ):
+    def test_backup_app_action_error(self, mock_get_charm_backup_instance: Mock, mock_get_leader: Mock):
         model_name = "my-model"
         charm_name = "my-charm"
         app_name = "my-app"
@@ -287,14 +289,12 @@ class TestControllerProcessor(unittest.TestCase):
             app=mock_application, app_name=app_name, model_name=model_name, charm_name=charm_name
         )
 
-        mock_tracker.add_error.assert_called_once_with(
+        self.mock_tracker.add_error.assert_called_once_with(
             controller=controller_name, model=model_name, app=app_name, charm=charm_name, error_reason=str(action_error)
         )
 
     @patch("jujubackupall.process.get_leader")
-    @patch("jujubackupall.process.ControllerProcessor._log")
-    @patch("jujubackupall.process.tracker")
-    def test_backup_action_no_leader(self, mock_tracker: Mock, mock_log: Mock, mock_get_leader: Mock):
+    def test_backup_action_no_leader(self, mock_get_leader: Mock):
         model_name = "my-model"
         charm_name = "my-charm"
         app_name = "my-app"
@@ -311,7 +311,7 @@ class TestControllerProcessor(unittest.TestCase):
             app=mock_application, app_name=app_name, model_name=model_name, charm_name=charm_name
         )
 
-        mock_tracker.add_error.assert_called_once_with(
+        self.mock_tracker.add_error.assert_called_once_with(
             controller=controller_name,
             model=model_name,
             app=app_name,
@@ -326,5 +326,5 @@ class TestControllerProcessor(unittest.TestCase):
         self.mock_controller.controller_name = controller_name
         controller_processor = self.create_controller_processor()
         actual_path = controller_processor.generate_full_backup_path(model_name=model_name, app_name=app_name)
-        expected_path = Path("{}/{}/{}/{}".format(self.base_output_path, controller_name, model_name, app_name))
+        expected_path = self.base_output_path / controller_name / model_name / app_name
         self.assertEqual(actual_path, expected_path)
@@ -1,8 +1,11 @@
 #!/usr/bin/python3
 """ Unit tests for utils.py """
-import unittest
+import asyncio
 from concurrent.futures import TimeoutError
-from unittest.mock import Mock, patch
+from types import SimpleNamespace
+from unittest.mock import DEFAULT, AsyncMock, Mock, patch
+
+import pytest
 
 from jujubackupall.errors import ActionError, JujuTimeoutError, NoLeaderError
 from jujubackupall.utils import (
@@ -17,199 +20,209 @@ from jujubackupall.utils import (
 )
 
 
-class TestParseCharmName(unittest.TestCase):
-    def test_parse_nonpromulgated_charm(self):
-        charm_url = "cs:~containers/containerd-146"
-        result = parse_charm_name(charm_url)
-        self.assertEqual(result, "containerd")
-
-    def test_parse_promulgated_charm(self):
-        charm_url = "cs:mysql-innodb-cluster-9"
-        result = parse_charm_name(charm_url)
-        self.assertEqual(result, "mysql-innodb-cluster")
-
-
-class TestConnectController(unittest.TestCase):
-    @patch("jujubackupall.utils.Controller", return_value=Mock())
-    @patch("jujubackupall.utils.run_async")
-    def test_connect_controller_with_name(self, mock_run_async: Mock, mock_controller: Mock):
-        my_controller_name = "my-controller"
-        mock_controller_instance = mock_controller.return_value
-        with connect_controller(my_controller_name):
-            pass
-        mock_controller_instance.connect.assert_called_with(my_controller_name)
-        mock_controller_instance.disconnect.assert_called_once()
-
-    @patch("jujubackupall.utils.Controller", return_value=Mock())
-    @patch("jujubackupall.utils.run_async")
-    def test_connect_controller_with_empty_name(self, mock_run_async: Mock, mock_controller: Mock):
-        empty_controller_name = ""
-        mock_controller_instance = mock_controller.return_value
-        with connect_controller(empty_controller_name):
-            pass
-        mock_controller_instance.connect.assert_called_once_with()
-        mock_controller_instance.disconnect.assert_called_once()
-
-
-class TestConnectModel(unittest.TestCase):
-    @patch("jujubackupall.utils.run_async")
-    def test_connect_model(self, mock_run_async: Mock):
-        model_name = "my-model"
-        mock_model = Mock()
-        mock_controller = Mock()
-        mock_run_async.return_value = mock_model
-        with connect_model(mock_controller, model_name):
-            pass
-        mock_controller.get_model.assert_called_with(model_name)
-        mock_model.disconnect.assert_called_once()
-
-
-class TestGetAllControllers(unittest.TestCase):
-    @patch("jujubackupall.utils.Juju")
-    def test_get_all_controllers(self, mock_juju_class: Mock):
-        controller_name_1 = "my-controller-1"
-        controller_name_2 = "my-controller-2"
-        controller_dict = {controller_name_1: None, controller_name_2: None}
-        mock_juju_inst = Mock()
-        mock_juju_inst.get_controllers.return_value = controller_dict
-        mock_juju_class.return_value = mock_juju_inst
-        actual_controller_names = get_all_controllers()
-        self.assertEqual(len(actual_controller_names), 2, "assert excpected number of controller names returned")
-        self.assertIn(controller_name_1, actual_controller_names)
-        self.assertIn(controller_name_2, actual_controller_names)
-
-
-class TestGetLeader(unittest.TestCase):
-    @patch("jujubackupall.utils.run_async")
-    def test_get_leader(self, mock_run_async: Mock):
-        mock_units = [Mock() for _ in range(3)]
-        mock_units[0].is_leader_from_status.return_value = False
-        mock_units[1].is_leader_from_status.return_value = False
-        mock_units[2].is_leader_from_status.return_value = True
-        mock_run_async.side_effect = [False, False, True]
-        actual_leader = get_leader(mock_units)
-        mock_units[2].is_leader_from_status.assert_called_once()
-        self.assertEqual(actual_leader, mock_units[2])
-
-    @patch("jujubackupall.utils.run_async")
-    def test_get_leader_no_leader(self, mock_run: Mock):
-        mock_units = [Mock() for _ in range(3)]
-        mock_units[0].is_leader_from_status.return_value = False
-        mock_units[1].is_leader_from_status.return_value = False
-        mock_units[2].is_leader_from_status.return_value = False
-        mock_run.side_effect = [False, False, False]
-        with self.assertRaises(NoLeaderError):
-            get_leader(mock_units)
-        mock_units[2].is_leader_from_status.assert_called_once()
-
-
-class TestCheckOutputUnitAction(unittest.TestCase):
-    @patch("jujubackupall.utils.wait_for")
-    @patch("jujubackupall.utils.run_async")
-    def test_check_output_unit_action_success_no_params(self, mock_run_async: Mock, mock_wait_for: Mock):
-        action_name = "my-action"
-        safe_data = dict(status="completed")
-        mock_unit = Mock()
-        mock_action = Mock()
-        mock_action.safe_data = safe_data
-        mock_run_async.return_value = mock_action
-        mock_run_async.return_value.results = "foo"
-        result = check_output_unit_action(mock_unit, action_name)
-        self.assertEqual(mock_run_async.call_count, 2, "assert run_async called twice")
-        self.assertEqual(result, "foo")
-        mock_unit.run_action.assert_called_once_with(action_name)
-        mock_action.wait.assert_called_once()
-
-    @patch("jujubackupall.utils.wait_for")
-    @patch("jujubackupall.utils.run_async")
-    def test_check_output_unit_action_success_with_params(self, mock_run_async: Mock, mock_wait_for: Mock):
-        action_name = "my-action"
-        action_params = dict(param_one="hello", param_two="world")
-        safe_data = dict(status="completed")
-        mock_unit = Mock()
-        mock_action = Mock()
-        mock_action.safe_data = safe_data
-        mock_run_async.return_value = mock_action
-        mock_run_async.return_value.results = "foo"
-        result = check_output_unit_action(mock_unit, action_name, **action_params)
-        self.assertEqual(mock_run_async.call_count, 2, "assert run_async called twice")
-        self.assertEqual(result, "foo")
-        mock_unit.run_action.assert_called_once_with(action_name, **action_params)
-        mock_action.wait.assert_called_once()
-
-    @patch("jujubackupall.utils.wait_for")
-    @patch("jujubackupall.utils.run_async")
-    def test_check_output_unit_action_failure(self, mock_run_async: Mock, mock_wait_for: Mock):
-        action_name = "my-action"
-        failure_status = "failure"
-        failure_results = dict(status=failure_status)
-        safe_data = dict(status=failure_status, results=failure_results)
-        mock_unit = Mock()
-        mock_action = Mock()
-        mock_action.safe_data = safe_data
-        mock_run_async.return_value = mock_action
-        with self.assertRaises(ActionError) as context:
-            check_output_unit_action(mock_unit, action_name)
-        self.assertTrue(failure_status in str(context.exception))
-        self.assertTrue(context.exception.results(), failure_results)
-
-
-class TestBackupController(unittest.TestCase):
-    @patch("jujubackupall.utils.run_with_timeout")
-    @patch("jujubackupall.utils.run_async")
-    def test_backup_controller_success(self, mock_run_async: Mock, mock_run_with_timeout: Mock):
-        mock_model = Mock()
-        mock_controller = Mock()
-        expected_dict = dict()
-        controller_name = "my-controller"
-        local_backup_filename = "local_filename"
-
-        mock_run_async.return_value = mock_model
-        mock_run_with_timeout.return_value = (local_backup_filename, expected_dict)
-        mock_controller.controller_name = controller_name
-
-        actual_filename, actual_dict = backup_controller(mock_controller)
-
-        mock_controller.get_model.assert_called_once_with("controller")
-        mock_run_with_timeout.assert_called_once_with(
-            mock_model.create_backup(), "controller backup on controller {}".format(controller_name)
-        )
-        self.assertEqual(actual_filename, local_backup_filename)
-        self.assertEqual(actual_dict, expected_dict)
-
-
-class TestRunWithTimeout(unittest.TestCase):
-    @patch("jujubackupall.utils.globals")
-    @patch("jujubackupall.utils.run_async")
-    @patch("jujubackupall.utils.wait_for")
-    def test_ran_with_no_timeout(self, mock_wait_for: Mock, mock_run_async: Mock, mock_globals: Mock):
-        mock_coroutine = Mock()
-        task = "some task"
-        expected_result = "my result"
-        timeout = 60
-
-        mock_globals.async_timeout = timeout
-        mock_run_async.return_value = expected_result
-
-        actual_result = run_with_timeout(mock_coroutine, task)
-
-        mock_wait_for.assert_called_once_with(mock_coroutine, timeout)
-        self.assertEqual(actual_result, expected_result)
-
-    @unittest.skip("reason: LP#1951914")
-    @patch("jujubackupall.utils.run_async")
-    @patch("jujubackupall.utils.wait_for")
-    def test_ran_with_timeout(self, mock_wait_for: Mock, mock_run_async: Mock):
-        mock_coroutine = Mock()
-        task = "some task"
-
-        mock_wait_for.side_effect = TimeoutError()
-
-        with self.assertRaises(JujuTimeoutError) as context:
-            run_with_timeout(mock_coroutine, task)
-
-        self.assertIn(task, str(context.exception))
-
-
-if __name__ == "__main__":
-    unittest.main()
+@pytest.mark.parametrize(
+    "charm_url, expected_charm_name",
+    [
+        ("cs:~containers/containerd-146", "containerd"),
+        ("cs:mysql-innodb-cluster-9", "mysql-innodb-cluster"),
+        ("ch:amd64/focal/postgresql-123", "postgresql"),
+    ],
+)
+def test_parse_charm_name(charm_url, expected_charm_name):
+    assert parse_charm_name(charm_url) == expected_charm_name
+
+
+@pytest.fixture
+def mock_controller_class():
+    with patch.multiple("jujubackupall.utils", Controller=DEFAULT, run_async=DEFAULT) as mocks:
+        yield mocks["Controller"]
+
+
+def test_connect_controller_with_name(mock_controller_class: Mock):
+    my_controller_name = "my-controller"
+    mock_controller_instance = mock_controller_class.return_value
+    with connect_controller(my_controller_name):
+        pass
+    mock_controller_instance.connect.assert_called_with(my_controller_name)
+    mock_controller_instance.disconnect.assert_called_once()
+
+
+def test_connect_controller_with_empty_name(mock_controller_class: Mock):
+    empty_controller_name = ""
+    mock_controller_instance = mock_controller_class.return_value
+    with connect_controller(empty_controller_name):
+        pass
+    mock_controller_instance.connect.assert_called_once_with()
+    mock_controller_instance.disconnect.assert_called_once()
+
+
+@patch("jujubackupall.utils.run_async")
+def test_connect_model(mock_run_async: Mock):
+    model_name = "my-model"
+    mock_model = Mock()
+    mock_controller = Mock()
+    mock_run_async.return_value = mock_model
+    with connect_model(mock_controller, model_name):
+        pass
+    mock_controller.get_model.assert_called_with(model_name)
+    mock_model.disconnect.assert_called_once()
+
+
+@patch("jujubackupall.utils.Juju")
+def test_get_all_controllers(mock_juju_class: Mock):
+    controller_name_1 = "my-controller-1"
+    controller_name_2 = "my-controller-2"
+    controller_dict = {controller_name_1: None, controller_name_2: None}
+    mock_juju_inst = Mock()
+    mock_juju_inst.get_controllers.return_value = controller_dict
+    mock_juju_class.return_value = mock_juju_inst
+    actual_controller_names = get_all_controllers()
+    assert len(actual_controller_names) == 2, "assert excpected number of controller names returned"
+    assert controller_name_1 in actual_controller_names
+    assert controller_name_2 in actual_controller_names
+
+
+def _units(*is_leader_from_status):
+    """Build bare units for get_leader, which only calls is_leader_from_status on them."""
+    return [SimpleNamespace(is_leader_from_status=is_leader) for is_leader in is_leader_from_status]
+
+
+def test_get_leader():
+    mock_units = _units(AsyncMock(return_value=False), AsyncMock(return_value=False), AsyncMock(return_value=True))
+    actual_leader = get_leader(mock_units)
+    mock_units[2].is_leader_from_status.assert_called_once()
+    assert actual_leader == mock_units[2]
+
+
+def test_get_leader_cancels_pending():
+    cancelled = []
+
+    async def never_returns():
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    mock_units = _units(
+        AsyncMock(side_effect=never_returns), AsyncMock(return_value=True), AsyncMock(side_effect=never_returns)
+    )
+    actual_leader = get_leader(mock_units)
+    assert actual_leader == mock_units[1]
+    assert len(cancelled) == 2, "assert both pending leadership queries were cancelled"
+
+
+def test_get_leader_no_leader():
+    mock_units = _units(AsyncMock(return_value=False), AsyncMock(return_value=False), AsyncMock(return_value=False))
+    with pytest.raises(NoLeaderError):
+        get_leader(mock_units)
+    mock_units[2].is_leader_from_status.assert_called_once()
+
+
+def create_mock_unit(status, results=None):
+    mock_action = Mock()
+    mock_action.status = status
+    mock_action.results = results
+    mock_action.safe_data = dict(status=status, results=results)
+    mock_action.wait = AsyncMock(return_value=mock_action)
+    mock_unit = Mock(spec=["run_action"])
+    mock_unit.run_action = AsyncMock(return_value=mock_action)
+    return mock_unit, mock_action
+
+
+@pytest.mark.parametrize(
+    "action_params, status, results, raises",
+    [
+        pytest.param({}, "completed", "foo", None, id="success-no-params"),
+        pytest.param(dict(param_one="hello", param_two="world"), "completed", "foo", None, id="success-with-params"),
+        pytest.param({}, "failure", dict(status="failure"), ActionError, id="failure"),
+    ],
+)
+def test_check_output_unit_action(action_params, status, results, raises):
+    action_name = "my-action"
+    mock_unit, mock_action = create_mock_unit(status, results)
+    if raises is None:
+        assert check_output_unit_action(mock_unit, action_name, **action_params) == results
+    else:
+        with pytest.raises(raises) as context:
+            check_output_unit_action(mock_unit, action_name, **action_params)
+        assert status in str(context.value)
+        assert context.value.results() == results
+    mock_unit.run_action.assert_called_once_with(action_name, **action_params)
+    mock_action.wait.assert_called_once()
+
+
+@pytest.fixture
+def backup_mocks():
+    with patch.multiple("jujubackupall.utils", run_with_timeout=DEFAULT, run_async=DEFAULT) as mocks:
+        yield mocks
+
+
+def test_backup_controller_success(backup_mocks):
+    mock_run_async, mock_run_with_timeout = backup_mocks["run_async"], backup_mocks["run_with_timeout"]
+    mock_model = Mock()
+    mock_controller = Mock()
+    expected_dict = dict()
+    controller_name = "my-controller"
+    local_backup_filename = "local_filename"
+
+    mock_run_async.return_value = mock_model
+    mock_run_with_timeout.return_value = (local_backup_filename, expected_dict)
+    mock_controller.controller_name = controller_name
+
+    actual_filename, actual_dict = backup_controller(mock_controller)
+
+    mock_controller.get_model.assert_called_once_with("controller")
+    mock_run_with_timeout.assert_called_once_with(
+        mock_model.create_backup(), "controller backup on controller {}".format(controller_name)
+    )
+    assert actual_filename == local_backup_filename
+    assert actual_dict == expected_dict
+
+
+def test_backup_controller_reuses_controller_model(backup_mocks):
+    mock_run_async, mock_run_with_timeout = backup_mocks["run_async"], backup_mocks["run_with_timeout"]
+    mock_controller = Mock()
+    mock_run_async.return_value = Mock()
+    mock_run_with_timeout.return_value = ("local_filename", dict())
+
+    backup_controller(mock_controller)
+    backup_controller(mock_controller)
+
+    mock_controller.get_model.assert_called_once_with("controller")
+    assert mock_run_with_timeout.call_count == 2, "assert a backup was created each time"
+
+
+# wait_for is a coroutine function, so a plain Mock keeps patch from creating coroutines nobody awaits
+@patch("jujubackupall.utils.globals")
+@patch("jujubackupall.utils.run_async")
+@patch("jujubackupall.utils.wait_for", new_callable=Mock)
+def test_ran_with_no_timeout(mock_wait_for: Mock, mock_run_async: Mock, mock_globals: Mock):
+    mock_coroutine = Mock()
+    task = "some task"
+    expected_result = "my result"
+    timeout = 60
+
+    mock_globals.async_timeout = timeout
+    mock_run_async.return_value = expected_result
+
+    actual_result = run_with_timeout(mock_coroutine, task)
+
+    mock_wait_for.assert_called_once_with(mock_coroutine, timeout)
+    assert actual_result == expected_result
+
+
+@patch("jujubackupall.utils.globals")
+@patch("jujubackupall.utils.run_async")
+@patch("jujubackupall.utils.wait_for", new_callable=Mock)
+def test_ran_with_timeout(mock_wait_for: Mock, mock_run_async: Mock, mock_globals: Mock):
+    mock_coroutine = Mock()
+    task = "some task"
+
+    mock_globals.async_timeout = 60
+    mock_run_async.side_effect = TimeoutError()
+
+    with pytest.raises(JujuTimeoutError) as context:
+        run_with_timeout(mock_coroutine, task)
+
+    assert task in str(context.value)